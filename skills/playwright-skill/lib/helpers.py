@@ -676,6 +676,7 @@ except ImportError:
 from .persistent_session import (
     is_persistent_session_running,
     get_persistent_session_info,
+    get_reusable_session_port,
     connect_to_persistent_session,
 )
 
@@ -710,5 +711,6 @@ __all__ = [
     'stop_virtual_display',
     'is_persistent_session_running',
     'get_persistent_session_info',
+    'get_reusable_session_port',
     'connect_to_persistent_session',
 ]
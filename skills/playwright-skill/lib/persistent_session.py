@@ -30,6 +30,7 @@ Quick start:
 """
 
 import json
+import os
 import socket
 import urllib.request
 from typing import Optional, Dict, Any
@@ -37,6 +38,9 @@ from typing import Optional, Dict, Any
 DEFAULT_PORT = 9222
 DEFAULT_HOST = "localhost"
 
+# Opt-in for run.py's auto-configured snippets to reuse a running session
+REUSE_SESSION_ENV = "PATCHRIGHT_REUSE_SESSION"
+
 
 def is_persistent_session_running(port: int = DEFAULT_PORT, host: str = DEFAULT_HOST) -> bool:
     """
@@ -87,6 +91,30 @@ def get_persistent_session_info(
         return None
 
 
+def get_reusable_session_port() -> Optional[int]:
+    """
+    Port of a persistent session that auto-configured scripts should reuse.
+
+    Reuse is opt-in via PATCHRIGHT_REUSE_SESSION: "1" or "true" selects the
+    default port, any other number selects that port.
+
+    Returns:
+        The port if reuse is enabled and Chrome is reachable on it, else None
+        (callers then launch their own browser).
+    """
+    value = os.environ.get(REUSE_SESSION_ENV, "").strip().lower()
+    if value in ("", "0", "false", "no"):
+        return None
+    if value in ("1", "true", "yes"):
+        port = DEFAULT_PORT
+    else:
+        try:
+            port = int(value)
+        except ValueError:
+            return None
+    return port if is_persistent_session_running(port) else None
+
+
 async def connect_to_persistent_session(
     playwright,
     port: int = DEFAULT_PORT,
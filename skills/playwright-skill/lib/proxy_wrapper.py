@@ -10,12 +10,16 @@ Inspired by the local forwarding proxy pattern used in simonw/research go-rod-cl
 """
 
 import socket
+import selectors
 import threading
 import base64
+import functools
 import logging
 import os
+import queue
 import shutil
 import subprocess
+import sys
 import time
 from ipaddress import ip_address
 from urllib.parse import urlparse
@@ -25,7 +29,53 @@ logger = logging.getLogger(__name__)
 _wrapper_thread = None
 _wrapper_server = None
 _wrapper_port = None
+_wrapper_wakeup = None
+_handshake_pool = None
 _xvfb_process = None
+_tunnel_reactor = None
+_tunnel_reactor_lock = threading.Lock()
+
+# Where X servers leave their lock files and sockets
+_X_LOCK_DIR = '/tmp'
+_X_SOCKET_DIR = '/tmp/.X11-unix'
+
+# Read size used when forwarding tunnel traffic. Tunnels carry bulk TLS, so
+# read in large chunks and give the kernel socket buffers to match.
+_TUNNEL_CHUNK = 65536
+_SOCKET_BUFFER_SIZE = 1 << 20
+
+# Worker threads for reading requests and doing upstream handshakes. Open
+# tunnels live on the reactor, so workers are only busy briefly per connection.
+_HANDSHAKE_WORKERS = 64
+
+# Seconds a new connection may take to send its request head. Chrome opens
+# speculative connections that may send nothing at all; without a limit a
+# handful of them would hold every handshake worker.
+_HEAD_READ_TIMEOUT = 5
+
+# Lowercased header name stripped from client requests before injecting ours
+_PROXY_AUTH_PREFIX = b'proxy-authorization:'
+_PROXY_AUTH_PREFIX_LEN = len(_PROXY_AUTH_PREFIX)
+
+# Status-line prefixes of a successful upstream CONNECT reply
+_CONNECT_OK = (b'HTTP/1.1 200', b'HTTP/1.0 200')
+
+# Hosts that never go through the upstream proxy, whatever NO_PROXY says
+_LOCAL_HOSTS = frozenset(('localhost', '127.0.0.1', '::1'))
+
+# Reusable forwarding buffers. Only connections that are currently streaming
+# or backed up hold one, so a small pool covers many open tunnels.
+_LISTEN_BACKLOG = socket.SOMAXCONN
+_BUFFER_POOL_SIZE = min(2 * _LISTEN_BACKLOG, 64)
+_buffer_pool = []
+_buffer_pool_lock = threading.Lock()
+
+# On Linux, tunnel bytes are moved socket -> pipe -> socket with splice(2) so
+# they never enter user space. Tunnels carry opaque TLS, so nothing is lost by
+# not looking at the data.
+_USE_SPLICE = sys.platform.startswith('linux') and hasattr(os, 'splice')
+if _USE_SPLICE:
+    _SPLICE_FLAGS = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
 
 
 def is_claude_code_remote_environment() -> bool:
@@ -73,6 +123,8 @@ def get_proxy_config():
     Get proxy configuration from environment.
 
     Reads HTTPS_PROXY, HTTP_PROXY, and NO_PROXY environment variables.
+    Parsing is memoized on the raw variable values, so repeated calls only
+    pay for the environment lookups while still noticing changes.
 
     Returns:
         Dict with proxy details or None
@@ -87,23 +139,73 @@ def get_proxy_config():
     if not proxy_url:
         return None
 
+    no_proxy_raw = os.environ.get('NO_PROXY') or os.environ.get('no_proxy') or ''
+    parsed = _parse_proxy_config(proxy_url, no_proxy_raw)
+    if parsed is None:
+        return None
+
+    host, port, username, password, no_proxy = parsed
+    return {
+        'host': host,
+        'port': port,
+        'username': username,
+        'password': password,
+        'url': proxy_url,
+        'no_proxy': list(no_proxy),
+    }
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_proxy_config(proxy_url, no_proxy_raw):
+    """Parse proxy URL and NO_PROXY values into an immutable tuple, or None if unusable."""
     parsed = urlparse(proxy_url)
 
     if not parsed.hostname or not parsed.port:
         return None
 
-    # Parse NO_PROXY into a list of patterns
-    no_proxy_raw = os.environ.get('NO_PROXY') or os.environ.get('no_proxy') or ''
-    no_proxy = [p.strip() for p in no_proxy_raw.split(',') if p.strip()]
+    # Parse NO_PROXY into a tuple of patterns
+    no_proxy = tuple(p.strip() for p in no_proxy_raw.split(',') if p.strip())
+
+    return parsed.hostname, parsed.port, parsed.username, parsed.password, no_proxy
 
-    return {
-        'host': parsed.hostname,
-        'port': parsed.port,
-        'username': parsed.username,
-        'password': parsed.password,
-        'url': proxy_url,
-        'no_proxy': no_proxy,
-    }
+
+@functools.lru_cache(maxsize=8)
+def _compile_no_proxy(patterns):
+    """
+    Precompile a tuple of NO_PROXY patterns for _should_bypass_proxy().
+
+    Returns:
+        Tuple of (wildcard, exact names, domain suffixes, IP addresses)
+    """
+    wildcard = False
+    exact = set()
+    suffixes = []
+    ips = set()
+
+    for pattern in patterns:
+        pattern = pattern.lower().strip()
+        if not pattern:
+            continue
+        if pattern == '*':
+            wildcard = True
+            continue
+
+        # "*.example.com" behaves exactly like ".example.com"
+        if pattern.startswith('*.'):
+            pattern = pattern[1:]
+
+        if pattern.startswith('.'):
+            suffixes.append(pattern)
+            exact.add(pattern[1:])
+            continue
+
+        exact.add(pattern)
+        try:
+            ips.add(ip_address(pattern))
+        except ValueError:
+            pass
+
+    return wildcard, frozenset(exact), tuple(suffixes), frozenset(ips)
 
 
 def _should_bypass_proxy(hostname, proxy_config):
@@ -122,48 +224,109 @@ def _should_bypass_proxy(hostname, proxy_config):
         True if the request should bypass the proxy
     """
     # Always bypass localhost regardless of NO_PROXY
-    if hostname in ('localhost', '127.0.0.1', '::1'):
+    if hostname in _LOCAL_HOSTS:
         return True
 
     no_proxy = proxy_config.get('no_proxy', [])
     if not no_proxy:
         return False
 
-    hostname_lower = hostname.lower()
-
-    for pattern in no_proxy:
-        pattern = pattern.lower().strip()
+    # Compiled once per distinct pattern list; keying on the current contents
+    # keeps callers that edit proxy_config['no_proxy'] correct
+    wildcard, exact, suffixes, ips = _compile_no_proxy(tuple(no_proxy))
+    if wildcard:
+        return True
 
-        if pattern == '*':
-            return True
+    hostname_lower = hostname.lower()
+    if hostname_lower in exact:
+        return True
+    if suffixes and hostname_lower.endswith(suffixes):
+        return True
 
-        # Check if it's an IP match
+    # Only IP literals can match an IP rule, and they parse at most once
+    if ips:
         try:
-            if ip_address(hostname) == ip_address(pattern):
-                return True
+            return ip_address(hostname) in ips
         except ValueError:
             pass
 
-        # Domain suffix match: ".example.com" or "*.example.com" matches "sub.example.com"
-        if pattern.startswith('.'):
-            if hostname_lower.endswith(pattern) or hostname_lower == pattern[1:]:
-                return True
-        elif pattern.startswith('*.'):
-            suffix = pattern[1:]  # "*.example.com" -> ".example.com"
-            if hostname_lower.endswith(suffix) or hostname_lower == pattern[2:]:
-                return True
-        elif hostname_lower == pattern:
-            return True
-
     return False
 
 
+def _tune_socket(sock):
+    """
+    Configure a client or upstream socket for forwarding.
+
+    Sizes the kernel buffers for bulk tunnel traffic and disables Nagle so the
+    small CONNECT request and reply are sent immediately instead of waiting
+    on a delayed ACK.
+    """
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError as e:
+        logger.debug("Could not tune socket: %s", e)
+
+
+def _acquire_buffer():
+    """Take a forwarding buffer from the pool, allocating one if it is empty."""
+    with _buffer_pool_lock:
+        if _buffer_pool:
+            return _buffer_pool.pop()
+    return bytearray(_TUNNEL_CHUNK)
+
+
+def _release_buffer(buf):
+    """Return a buffer from _acquire_buffer() to the pool."""
+    with _buffer_pool_lock:
+        if len(_buffer_pool) < _BUFFER_POOL_SIZE:
+            _buffer_pool.append(buf)
+
+
+def _recv_head(sock, buf):
+    """
+    Receive an HTTP message head into a preallocated buffer.
+
+    Reads with recv_into until the blank line ending the head arrives, the
+    peer closes, or the buffer is full. Only newly received bytes (plus the
+    three before them) are searched for the terminator each time.
+
+    Returns:
+        Number of bytes stored in buf
+    """
+    view = memoryview(buf)
+    size = 0
+    while size < len(buf):
+        n = sock.recv_into(view[size:])
+        if not n:
+            break
+        start = max(0, size - 3)
+        size += n
+        if buf.find(b'\r\n\r\n', start, size) != -1:
+            break
+    return size
+
+
+def _authority_host(authority):
+    """
+    Host part of a CONNECT "host:port" target, lowercased.
+
+    IPv6 literals lose their brackets ("[::1]:443" -> "::1") so they compare
+    equal to NO_PROXY entries and ip_address() can parse them.
+    """
+    if authority.startswith('['):
+        end = authority.find(']')
+        return authority[1:end].lower() if end != -1 else ''
+    host, sep, port = authority.rpartition(':')
+    return (host if sep else port).lower()
+
+
 def _build_auth_header(proxy_config):
-    """Build the Proxy-Authorization header value, or None if no credentials."""
+    """Build the Proxy-Authorization header value as bytes, or None if no credentials."""
     if proxy_config.get('username') and proxy_config.get('password'):
         credentials = f"{proxy_config['username']}:{proxy_config['password']}"
-        encoded = base64.b64encode(credentials.encode()).decode()
-        return f"Basic {encoded}"
+        return b"Basic " + base64.b64encode(credentials.encode())
     return None
 
 
@@ -171,94 +334,446 @@ def _inject_auth_header(request_lines, auth_header):
     """
     Strip any existing Proxy-Authorization and inject a new one.
 
-    Returns the modified request as a string ending with \\r\\n\\r\\n.
+    Works directly on the raw header lines (bytes, without line endings) so
+    requests are never decoded and re-encoded on their way upstream.
+
+    Returns the modified request head as bytes ending with \\r\\n\\r\\n.
     """
-    result = request_lines[0] + '\r\n'
-    for line in request_lines[1:]:
-        if line and not line.lower().startswith('proxy-authorization:'):
-            result += line + '\r\n'
+    out = [request_lines[0]]
+    out.extend(
+        line for line in request_lines[1:]
+        if line and line[:_PROXY_AUTH_PREFIX_LEN].lower() != _PROXY_AUTH_PREFIX
+    )
     if auth_header:
-        result = result.rstrip('\r\n') + '\r\n'
-        result += f'Proxy-Authorization: {auth_header}\r\n'
-    result += '\r\n'
-    return result
+        out.append(b'Proxy-Authorization: ' + auth_header)
+    out.append(b'')
+    out.append(b'')
+    return b'\r\n'.join(out)
 
 
-def _send_error(client_socket, status_code, reason):
-    """Send an HTTP error response back to the client (Chrome)."""
+@functools.lru_cache(maxsize=None)
+def _error_response(status_code, reason):
+    """Encoded HTTP error response; the handful of status/reason pairs used are built once."""
     body = f"{status_code} {reason}\r\n"
-    response = (
+    return (
         f"HTTP/1.1 {status_code} {reason}\r\n"
         f"Content-Type: text/plain\r\n"
         f"Content-Length: {len(body)}\r\n"
         f"Connection: close\r\n"
         f"\r\n"
         f"{body}"
-    )
+    ).encode()
+
+
+def _send_error(client_socket, status_code, reason):
+    """Send an HTTP error response back to the client (Chrome)."""
     try:
-        client_socket.sendall(response.encode())
+        client_socket.sendall(_error_response(status_code, reason))
     except OSError:
         pass
 
 
-def _forward_data(source, destination, label=""):
-    """Bidirectional forwarding helper with logging on errors."""
-    try:
-        while True:
-            data = source.recv(8192)
-            if not data:
-                break
-            destination.sendall(data)
-    except OSError as e:
-        logger.debug("Forward %s ended: %s", label, e)
-    finally:
-        for sock in (source, destination):
+class _TunnelStream:
+    """One direction of a tunnel: bytes read from ``source`` are written to ``destination``."""
+
+    __slots__ = ('source', 'destination', 'pending', '_buffer', '_start')
+
+    def __init__(self, source, destination):
+        self.source = source
+        self.destination = destination
+        self.pending = 0
+        self._buffer = None
+        self._start = 0
+
+    def fill(self, view):
+        """
+        Read one chunk from the source and write as much as possible onward.
+
+        Anything the destination cannot take right now is parked in a pooled
+        buffer; the reactor stops reading the source until it has been flushed.
+
+        Returns:
+            False once the source has reached EOF
+        """
+        n = self.source.recv_into(view)
+        if not n:
+            return False
+        try:
+            sent = self.destination.send(view[:n])
+        except BlockingIOError:
+            sent = 0
+        if sent < n:
+            self._buffer = _acquire_buffer()
+            self._buffer[:n - sent] = view[sent:n]
+            self._start = 0
+            self.pending = n - sent
+        return True
+
+    def flush(self):
+        """Write buffered bytes to the destination once it is writable again."""
+        start = self._start
+        try:
+            sent = self.destination.send(memoryview(self._buffer)[start:start + self.pending])
+        except BlockingIOError:
+            return
+        self._start += sent
+        self.pending -= sent
+        if not self.pending:
+            self.close()
+
+    def close(self):
+        if self._buffer is not None:
+            _release_buffer(self._buffer)
+            self._buffer = None
+
+
+class _SpliceStream:
+    """
+    Tunnel direction that moves bytes with splice(2) instead of recv/send.
+
+    Bytes the destination cannot take yet simply stay in the kernel pipe;
+    ``pending`` counts how many are waiting there.
+    """
+
+    __slots__ = ('source', 'destination', 'pending', '_pipe_r', '_pipe_w')
+
+    def __init__(self, source, destination):
+        self.source = source
+        self.destination = destination
+        self.pending = 0
+        self._pipe_r, self._pipe_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+
+    def fill(self, view):
+        try:
+            n = os.splice(self.source.fileno(), self._pipe_w, _TUNNEL_CHUNK, flags=_SPLICE_FLAGS)
+        except BlockingIOError:
+            return True
+        if not n:
+            return False
+        self.pending = n
+        self.flush()
+        return True
+
+    def flush(self):
+        try:
+            sent = os.splice(self._pipe_r, self.destination.fileno(), self.pending, flags=_SPLICE_FLAGS)
+        except BlockingIOError:
+            return
+        self.pending -= sent
+
+    def close(self):
+        for fd in (self._pipe_r, self._pipe_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def _make_stream(source, destination):
+    """Create a tunnel direction, preferring splice(2) where available."""
+    if _USE_SPLICE:
+        try:
+            return _SpliceStream(source, destination)
+        except OSError as e:
+            logger.debug("splice unavailable, using buffered forwarding: %s", e)
+    return _TunnelStream(source, destination)
+
+
+class _Tunnel:
+    """A client/upstream socket pair being forwarded by the reactor."""
+
+    __slots__ = ('streams', 'events')
+
+    def __init__(self, client_socket, proxy_socket, bidirectional=True):
+        # Keyed by the socket each stream reads from
+        self.streams = {proxy_socket: _make_stream(proxy_socket, client_socket)}
+        if bidirectional:
+            self.streams[client_socket] = _make_stream(client_socket, proxy_socket)
+        self.events = {client_socket: 0, proxy_socket: 0}
+
+    def wanted_events(self, sock):
+        """Selector events ``sock`` needs given what is currently buffered."""
+        events = 0
+        outgoing = self.streams.get(sock)
+        if outgoing is not None and not outgoing.pending:
+            events |= selectors.EVENT_READ
+        for stream in self.streams.values():
+            if stream.destination is sock and stream.pending:
+                events |= selectors.EVENT_WRITE
+        return events
+
+
+class _TunnelReactor:
+    """
+    Single selectors loop that forwards bytes for every established tunnel.
+
+    Handshake threads hand over their sockets once the upstream proxy has
+    accepted the CONNECT, so an open tunnel costs a selector registration
+    rather than two OS threads blocked in recv().
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._incoming = []
+        self._incoming_lock = threading.Lock()
+        self._tunnels = set()
+        self._running = True
+        self._buffer = bytearray(_TUNNEL_CHUNK)
+        self._thread = threading.Thread(target=self._run, name='proxy-wrapper-tunnels', daemon=True)
+        self._thread.start()
+
+    def add(self, client_socket, proxy_socket, bidirectional=True):
+        """
+        Start forwarding between two connected sockets. Safe to call from any thread.
+
+        With bidirectional=False only upstream -> client bytes are relayed,
+        which is how plain HTTP responses are streamed back. Once the reactor
+        has been stopped both sockets are closed instead.
+        """
+        for sock in (client_socket, proxy_socket):
+            sock.setblocking(False)
+        with self._incoming_lock:
+            if self._running:
+                self._incoming.append(_Tunnel(client_socket, proxy_socket, bidirectional))
+                accepted = True
+            else:
+                accepted = False
+        if accepted:
+            self._wake()
+            return
+        for sock in (client_socket, proxy_socket):
             try:
                 sock.close()
             except OSError:
                 pass
 
+    def stop(self):
+        """Close every tunnel and stop the reactor thread."""
+        with self._incoming_lock:
+            self._running = False
+        self._wake()
+        self._thread.join(timeout=2)
+
+    def _wake(self):
+        try:
+            self._wakeup_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _run(self):
+        view = memoryview(self._buffer)
+        try:
+            while self._running:
+                for key, mask in self._selector.select():
+                    if key.fileobj is self._wakeup_r:
+                        self._drain_wakeups()
+                    elif key.data in self._tunnels:
+                        self._service(key.data, key.fileobj, mask, view)
+        finally:
+            # Tunnels handed over but not yet picked up are closed too
+            with self._incoming_lock:
+                incoming, self._incoming = self._incoming, []
+            for tunnel in incoming:
+                for sock in tunnel.events:
+                    try:
+                        sock.close()
+                    except OSError:
+                        pass
+            for tunnel in list(self._tunnels):
+                self._close(tunnel)
+            self._selector.close()
+            self._wakeup_r.close()
+            self._wakeup_w.close()
+
+    def _drain_wakeups(self):
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self._incoming_lock:
+            incoming, self._incoming = self._incoming, []
+        for tunnel in incoming:
+            self._tunnels.add(tunnel)
+            self._update(tunnel)
+
+    def _service(self, tunnel, sock, mask, view):
+        try:
+            if mask & selectors.EVENT_WRITE:
+                for stream in tunnel.streams.values():
+                    if stream.destination is sock and stream.pending:
+                        stream.flush()
+            if mask & selectors.EVENT_READ:
+                stream = tunnel.streams.get(sock)
+                if stream is not None and not stream.pending and not stream.fill(view):
+                    self._close(tunnel)
+                    return
+        except (ConnectionResetError, BrokenPipeError):
+            # Chrome drops pooled connections this way all the time; not worth a record
+            self._close(tunnel)
+            return
+        except OSError as e:
+            logger.debug("Tunnel closed: %s", e)
+            self._close(tunnel)
+            return
+        self._update(tunnel)
+
+    def _update(self, tunnel):
+        """Sync selector registrations with what each socket is waiting for."""
+        for sock, current in tunnel.events.items():
+            wanted = tunnel.wanted_events(sock)
+            if wanted == current:
+                continue
+            if not current:
+                self._selector.register(sock, wanted, tunnel)
+            elif not wanted:
+                self._selector.unregister(sock)
+            else:
+                self._selector.modify(sock, wanted, tunnel)
+            tunnel.events[sock] = wanted
+
+    def _close(self, tunnel):
+        self._tunnels.discard(tunnel)
+        for sock, current in tunnel.events.items():
+            if current:
+                try:
+                    self._selector.unregister(sock)
+                except (KeyError, ValueError):
+                    pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+        for stream in tunnel.streams.values():
+            stream.close()
+
+
+class _WorkerPool:
+    """
+    Bounded pool of reusable daemon threads for client handshakes.
+
+    concurrent.futures.ThreadPoolExecutor joins its workers at interpreter
+    exit, so a handshake waiting on the 30s upstream timeout would hold up the
+    end of every short script; daemon workers keep the old exit behaviour.
+    """
+
+    def __init__(self, max_workers, name):
+        self._max_workers = max_workers
+        self._name = name
+        self._queue = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """Run fn(*args) on a worker, starting a new one only if none is idle."""
+        self._queue.put((fn, args))
+        if self._idle.acquire(blocking=False):
+            return
+        with self._lock:
+            if len(self._threads) < self._max_workers:
+                thread = threading.Thread(
+                    target=self._work, name=f'{self._name}-{len(self._threads)}', daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def shutdown(self):
+        """Let workers exit once queued work is done. Does not wait for them."""
+        with self._lock:
+            for _ in self._threads:
+                self._queue.put(None)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            fn, args = item
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.warning("Unhandled error in proxy worker: %s", e)
+            self._idle.release()
+
+
+def _get_tunnel_reactor(proxy_config):
+    """
+    Return the tunnel reactor for a connection.
+
+    Connections accepted by start_proxy_wrapper() use the reactor that wrapper
+    owns, so a handshake finishing after stop_proxy_wrapper() finds it stopped
+    instead of starting a new one. Direct handle_client() callers share one
+    started on first use.
+    """
+    reactor = proxy_config.get('tunnel_reactor')
+    if reactor is not None:
+        return reactor
+
+    global _tunnel_reactor
+    with _tunnel_reactor_lock:
+        if _tunnel_reactor is None:
+            _tunnel_reactor = _TunnelReactor()
+        return _tunnel_reactor
+
+
+def _resolve_upstream(proxy_config):
+    """Resolve the upstream proxy address once, or return None if the lookup fails."""
+    try:
+        infos = socket.getaddrinfo(
+            proxy_config['host'], proxy_config['port'], socket.AF_INET, socket.SOCK_STREAM
+        )
+    except OSError as e:
+        logger.warning("Could not resolve upstream proxy %s: %s", proxy_config['host'], e)
+        return None
+    return infos[0][4] if infos else None
+
+
+def _connect_upstream(proxy_config):
+    """Open a tuned TCP connection to the upstream proxy, using the cached address if any."""
+    addr = proxy_config.get('upstream_addr') or (proxy_config['host'], proxy_config['port'])
+    proxy_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        proxy_socket.settimeout(30)
+        _tune_socket(proxy_socket)
+        proxy_socket.connect(addr)
+    except BaseException:
+        proxy_socket.close()
+        raise
+    return proxy_socket
+
 
 def _handle_connect(client_socket, request_lines, proxy_config, auth_header):
     """Handle a CONNECT tunnel request."""
     proxy_socket = None
     try:
-        proxy_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        proxy_socket.settimeout(30)
-        proxy_socket.connect((proxy_config['host'], proxy_config['port']))
+        proxy_socket = _connect_upstream(proxy_config)
 
         modified = _inject_auth_header(request_lines, auth_header)
-        proxy_socket.sendall(modified.encode())
+        proxy_socket.sendall(modified)
 
         # Read upstream proxy response
-        response = b""
-        while b"\r\n\r\n" not in response:
-            chunk = proxy_socket.recv(4096)
-            if not chunk:
-                break
-            response += chunk
-
-        client_socket.sendall(response)
-
-        if b"200" in response[:50]:
-            # Tunnel established - bidirectional forwarding
-            t1 = threading.Thread(
-                target=_forward_data,
-                args=(client_socket, proxy_socket, "client->proxy"),
-                daemon=True,
-            )
-            t2 = threading.Thread(
-                target=_forward_data,
-                args=(proxy_socket, client_socket, "proxy->client"),
-                daemon=True,
-            )
-            t1.start()
-            t2.start()
-            t1.join()
-            t2.join()
+        buf = _acquire_buffer()
+        try:
+            size = _recv_head(proxy_socket, buf)
+            client_socket.sendall(memoryview(buf)[:size])
+            established = buf.startswith(_CONNECT_OK, 0, size)
+            if not established:
+                status_line = bytes(buf[:size]).split(b'\r\n', 1)[0]
+        finally:
+            _release_buffer(buf)
+
+        if established:
+            # Tunnel established - hand both sockets to the shared reactor
+            _get_tunnel_reactor(proxy_config).add(client_socket, proxy_socket)
         else:
-            status_line = response.split(b'\r\n', 1)[0].decode('utf-8', errors='ignore')
-            logger.warning("Upstream proxy rejected CONNECT: %s", status_line)
+            logger.warning(
+                "Upstream proxy rejected CONNECT: %s", status_line.decode('utf-8', errors='ignore')
+            )
             client_socket.close()
             proxy_socket.close()
 
@@ -280,28 +795,39 @@ def _handle_connect(client_socket, request_lines, proxy_config, auth_header):
                 pass
 
 
+def _force_connection_close(request_lines):
+    """
+    Replace any Connection/Proxy-Connection headers with 'Connection: close'.
+
+    The wrapper relays exactly one plain HTTP request per client connection,
+    so the upstream proxy must end the response by closing the socket.
+    """
+    lines = [
+        line for line in request_lines
+        if line[:11].lower() != b'connection:' and line[:17].lower() != b'proxy-connection:'
+    ]
+    lines.append(b'Connection: close')
+    return lines
+
+
 def _handle_http(client_socket, request_lines, full_request, proxy_config, auth_header):
     """Handle a plain HTTP request (GET, POST, etc.) through the proxy."""
     proxy_socket = None
     try:
-        proxy_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        proxy_socket.settimeout(30)
-        proxy_socket.connect((proxy_config['host'], proxy_config['port']))
+        proxy_socket = _connect_upstream(proxy_config)
 
-        modified = _inject_auth_header(request_lines, auth_header)
-        proxy_socket.sendall(modified.encode())
+        modified = _inject_auth_header(_force_connection_close(request_lines), auth_header)
 
-        # If the original request had a body beyond headers, forward it
+        # Send the head together with any body bytes read alongside it, so the
+        # request leaves in one write instead of two small segments
         header_end = full_request.find(b'\r\n\r\n')
         if header_end != -1 and header_end + 4 < len(full_request):
-            proxy_socket.sendall(full_request[header_end + 4:])
+            modified = b''.join((modified, memoryview(full_request)[header_end + 4:]))
+        proxy_socket.sendall(modified)
 
-        # Stream the response back to Chrome
-        while True:
-            chunk = proxy_socket.recv(8192)
-            if not chunk:
-                break
-            client_socket.sendall(chunk)
+        # Stream the response back to Chrome from the reactor; this worker is done
+        _get_tunnel_reactor(proxy_config).add(client_socket, proxy_socket, bidirectional=False)
+        return
 
     except socket.timeout:
         logger.warning("Timeout on HTTP request to upstream proxy")
@@ -309,44 +835,62 @@ def _handle_http(client_socket, request_lines, full_request, proxy_config, auth_
     except OSError as e:
         logger.warning("Error in HTTP handler: %s", e)
         _send_error(client_socket, 502, "Bad Gateway")
-    finally:
-        for sock in (client_socket, proxy_socket):
-            if sock:
-                try:
-                    sock.close()
-                except OSError:
-                    pass
+
+    for sock in (client_socket, proxy_socket):
+        if sock:
+            try:
+                sock.close()
+            except OSError:
+                pass
 
 
 def handle_client(client_socket, proxy_config):
     """Handle a single client connection - dispatches to CONNECT or HTTP handler."""
     try:
+        _tune_socket(client_socket)
+
         # Read the client request headers
-        request = b""
-        while b"\r\n\r\n" not in request:
-            chunk = client_socket.recv(4096)
-            if not chunk:
-                break
-            request += chunk
+        buf = _acquire_buffer()
+        try:
+            client_socket.settimeout(_HEAD_READ_TIMEOUT)
+            size = _recv_head(client_socket, buf)
+            client_socket.settimeout(None)
+            # Copy out through a memoryview: slicing the bytearray would copy twice
+            request = bytes(memoryview(buf)[:size])
+        except socket.timeout:
+            # Idle or stalled client: free the worker without answering
+            client_socket.close()
+            return
+        finally:
+            _release_buffer(buf)
 
         if not request:
             client_socket.close()
             return
 
-        request_str = request.decode('utf-8', errors='ignore')
-        lines = request_str.split('\r\n')
+        head_end = request.find(b'\r\n\r\n')
+        if head_end == -1:
+            if size == len(buf):
+                _send_error(client_socket, 431, "Request Header Fields Too Large")
+                client_socket.close()
+                return
+            head_end = size
+
+        # Headers stay as bytes; only the request target is decoded
+        lines = request[:head_end].split(b'\r\n')
 
-        if not lines or not lines[0]:
+        if not lines[0]:
             _send_error(client_socket, 400, "Bad Request")
             client_socket.close()
             return
 
-        method = lines[0].split(' ', 1)[0].upper()
+        parts = lines[0].split(b' ')
+        method = parts[0].upper()
 
         # Check NO_PROXY bypass
-        target = lines[0].split(' ')[1] if len(lines[0].split(' ')) > 1 else ''
-        if method == 'CONNECT':
-            hostname = target.split(':')[0]
+        target = parts[1].decode('utf-8', errors='ignore') if len(parts) > 1 else ''
+        if method == b'CONNECT':
+            hostname = _authority_host(target)
         else:
             try:
                 hostname = urlparse(target).hostname or ''
@@ -359,9 +903,13 @@ def handle_client(client_socket, proxy_config):
             client_socket.close()
             return
 
-        auth_header = _build_auth_header(proxy_config)
+        # start_proxy_wrapper() computes the header once for the wrapper's lifetime
+        if 'auth_header' in proxy_config:
+            auth_header = proxy_config['auth_header']
+        else:
+            auth_header = _build_auth_header(proxy_config)
 
-        if method == 'CONNECT':
+        if method == b'CONNECT':
             _handle_connect(client_socket, lines, proxy_config, auth_header)
         else:
             _handle_http(client_socket, lines, request, proxy_config, auth_header)
@@ -398,7 +946,7 @@ def start_proxy_wrapper(proxy_config, verbose=True):
     Returns:
         Dict with local proxy info including 'server' URL
     """
-    global _wrapper_server, _wrapper_port
+    global _wrapper_server, _wrapper_port, _tunnel_reactor
 
     if _wrapper_server:
         if verbose:
@@ -409,7 +957,7 @@ def start_proxy_wrapper(proxy_config, verbose=True):
     _wrapper_server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     _wrapper_server.bind(('127.0.0.1', 0))
     _wrapper_port = _wrapper_server.getsockname()[1]
-    _wrapper_server.listen(10)
+    _wrapper_server.listen(_LISTEN_BACKLOG)
 
     if verbose:
         print(f"   Starting proxy auth wrapper on 127.0.0.1:{_wrapper_port}")
@@ -417,24 +965,52 @@ def start_proxy_wrapper(proxy_config, verbose=True):
         if proxy_config.get('no_proxy'):
             print(f"   NO_PROXY: {', '.join(proxy_config['no_proxy'])}")
 
+    # Credentials and the upstream address are fixed for the wrapper's
+    # lifetime, so encode/resolve them once here rather than on every
+    # connection. Work on a copy so the caller's dict is left untouched.
+    # The reactor travels with it, tying every tunnel to this wrapper.
+    with _tunnel_reactor_lock:
+        if _tunnel_reactor is None:
+            _tunnel_reactor = _TunnelReactor()
+        reactor = _tunnel_reactor
+    proxy_config = {
+        **proxy_config,
+        'auth_header': _build_auth_header(proxy_config),
+        'upstream_addr': _resolve_upstream(proxy_config),
+        'tunnel_reactor': reactor,
+    }
+
     server_ref = _wrapper_server
+    server_ref.setblocking(False)
+    pool = _WorkerPool(_HANDSHAKE_WORKERS, 'proxy-wrapper')
+    # stop_proxy_wrapper() writes to this to wake the accept loop promptly
+    wakeup_r, wakeup_w = socket.socketpair()
 
     def accept_connections():
-        while True:
-            try:
-                client, addr = server_ref.accept()
-                thread = threading.Thread(target=handle_client, args=(client, proxy_config), daemon=True)
-                thread.start()
-            except OSError:
-                break
+        with selectors.DefaultSelector() as sel:
+            sel.register(server_ref, selectors.EVENT_READ)
+            sel.register(wakeup_r, selectors.EVENT_READ)
+            while True:
+                ready = sel.select()
+                if any(key.fileobj is wakeup_r for key, _ in ready):
+                    break
+                try:
+                    client, addr = server_ref.accept()
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    break
+                pool.submit(handle_client, client, proxy_config)
+        wakeup_r.close()
 
-    global _wrapper_thread
+    global _wrapper_thread, _wrapper_wakeup, _handshake_pool
+    _wrapper_wakeup = wakeup_w
+    _handshake_pool = pool
     _wrapper_thread = threading.Thread(target=accept_connections, daemon=True)
     _wrapper_thread.start()
 
-    # Give it a moment to start
-    time.sleep(0.1)
-
+    # No startup wait needed: the socket is already listening, so connections
+    # queue in the backlog until the accept thread picks them up.
     return {'server': f'http://127.0.0.1:{_wrapper_port}'}
 
 
@@ -444,16 +1020,52 @@ def _has_display() -> bool:
     return bool(display)
 
 
+def _used_display_numbers(directory, prefix, suffix):
+    """Collect X display numbers from lock/socket file names with one directory scan."""
+    numbers = set()
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(prefix) and name.endswith(suffix):
+                    digits = name[len(prefix):len(name) - len(suffix)]
+                    if digits.isdigit():
+                        numbers.add(int(digits))
+    except OSError:
+        pass
+    return numbers
+
+
 def _find_free_display() -> int:
     """Find an unused X display number."""
+    in_use = (
+        _used_display_numbers(_X_LOCK_DIR, '.X', '-lock')
+        | _used_display_numbers(_X_SOCKET_DIR, 'X', '')
+    )
     for display_num in range(99, 200):
-        lock_file = f'/tmp/.X{display_num}-lock'
-        sock_file = f'/tmp/.X11-unix/X{display_num}'
-        if not os.path.exists(lock_file) and not os.path.exists(sock_file):
+        if display_num not in in_use:
             return display_num
     return 99
 
 
+def _wait_for_display(process, display_num, timeout=2.0) -> bool:
+    """
+    Wait for Xvfb to create its display socket.
+
+    Returns as soon as the socket appears, or False if Xvfb exits first. If
+    neither happens before the timeout, a still-running Xvfb counts as ready.
+    """
+    sock_path = os.path.join(_X_SOCKET_DIR, f'X{display_num}')
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        if os.path.exists(sock_path):
+            return True
+        time.sleep(0.01)
+    return process.poll() is None
+
+
 def ensure_virtual_display(verbose=True) -> bool:
     """
     Start Xvfb virtual display if no display is available.
@@ -512,10 +1124,7 @@ def ensure_virtual_display(verbose=True) -> bool:
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
-        # Give Xvfb a moment to start
-        time.sleep(0.5)
-
-        if _xvfb_process.poll() is not None:
+        if not _wait_for_display(_xvfb_process, display_num):
             if verbose:
                 print("   Xvfb failed to start, falling back to headless mode")
             _xvfb_process = None
@@ -620,9 +1229,13 @@ def get_browser_config(headless=None, verbose=True, use_chrome=True):
             config['launch_options']['headless'] = not has_display
             config['xvfb_used'] = has_display
             if has_display:
-                # Explicitly pass DISPLAY to Chrome via env - Playwright's process
-                # spawning may not inherit os.environ changes made after startup
-                config['launch_options']['env'] = {**os.environ}
+                if _xvfb_process is not None:
+                    # We set DISPLAY ourselves, so pass it to Chrome explicitly -
+                    # Playwright's process spawning may not inherit os.environ
+                    # changes made after startup. Playwright replaces the child
+                    # environment wholesale when env is given, so this must be a
+                    # full copy. A pre-existing DISPLAY is inherited and needs none.
+                    config['launch_options']['env'] = {**os.environ}
                 if verbose:
                     print("   Headed mode via Xvfb (better anti-bot evasion)")
         elif headless is None:
@@ -648,19 +1261,38 @@ def get_browser_config(headless=None, verbose=True, use_chrome=True):
 
 
 def stop_proxy_wrapper():
-    """Stop the proxy wrapper server."""
-    global _wrapper_server, _wrapper_thread, _wrapper_port
+    """Stop the proxy wrapper server and close any open tunnels."""
+    global _wrapper_server, _wrapper_thread, _wrapper_port, _wrapper_wakeup
+    global _handshake_pool, _tunnel_reactor
 
     if _wrapper_server:
-        try:
-            _wrapper_server.close()
-        except OSError:
-            pass
+        # Wake the accept loop before closing the listening socket it selects on
+        if _wrapper_wakeup is not None:
+            try:
+                _wrapper_wakeup.send(b'\0')
+            except OSError:
+                pass
         if _wrapper_thread is not None:
             _wrapper_thread.join(timeout=2)
+        for sock in (_wrapper_server, _wrapper_wakeup):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        if _handshake_pool is not None:
+            # Don't wait: in-flight handshakes finish (or fail) on their own
+            _handshake_pool.shutdown()
         _wrapper_server = None
         _wrapper_thread = None
         _wrapper_port = None
+        _wrapper_wakeup = None
+        _handshake_pool = None
+
+    with _tunnel_reactor_lock:
+        reactor, _tunnel_reactor = _tunnel_reactor, None
+    if reactor is not None:
+        reactor.stop()
 
 
 __all__ = [
@@ -10,50 +10,96 @@ Ensures proper module resolution by running from skill directory.
 Uses Patchright (undetected Playwright fork) for anti-bot evasion.
 """
 
-import glob
+import ast
+import asyncio
+import atexit
+import importlib
+import importlib.util
+import json
+import linecache
 import os
+import shutil
 import subprocess
 import sys
-import tempfile
+import textwrap
+import types
 from pathlib import Path
 
-# Change to skill directory for proper module resolution
 SKILL_DIR = Path(__file__).parent.resolve()
-os.chdir(SKILL_DIR)
 
-# Add skill directory to Python path
-sys.path.insert(0, str(SKILL_DIR))
+# Inline snippets use top-level await, so they only parse with this flag
+_AST_FLAGS = ast.PyCF_ONLY_AST | ast.PyCF_ALLOW_TOP_LEVEL_AWAIT
 
 
 def check_patchright_installed():
-    """Check if Patchright is installed"""
-    try:
-        import patchright
-
-        return True
-    except ImportError:
-        return False
+    """Check if Patchright is installed, without importing it"""
+    return importlib.util.find_spec("patchright") is not None
 
 
 def is_uv_available():
-    """Check if uv is available"""
-    try:
-        subprocess.run(["uv", "--version"], check=True, capture_output=True)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
+    """Check if uv is available on PATH"""
+    return shutil.which("uv") is not None
 
 
 def find_vendor_wheel():
     """Find vendored patched patchright wheel if available."""
     vendor_dir = SKILL_DIR.parent.parent / "vendor"
-    if vendor_dir.is_dir():
-        wheels = list(vendor_dir.glob("patchright-*.whl"))
-        if wheels:
-            return str(wheels[0])
+    try:
+        entries = os.scandir(vendor_dir)
+    except OSError:
+        return None
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("patchright-") and name.endswith(".whl") and entry.is_file():
+                return entry.path
     return None
 
 
+def _browsers_dir():
+    """Directory Playwright installs browsers into, or None if it lives inside the package."""
+    override = os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+    if override:
+        return None if override == "0" else Path(override)
+    if sys.platform == "win32":
+        return Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local")) / "ms-playwright"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "ms-playwright"
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ms-playwright"
+
+
+# What 'patchright install chromium' downloads, keyed by browsers.json name
+_CHROMIUM_DOWNLOADS = ("chromium", "chromium-headless-shell", "ffmpeg")
+
+
+def is_chromium_installed():
+    """Check whether the Chromium builds pinned by the installed patchright are present.
+
+    Reads the revisions from the package's browsers.json and looks for the
+    marker Playwright writes once each download completes. Anything
+    unexpected counts as not installed, so the real installer runs.
+    """
+    importlib.invalidate_caches()
+    try:
+        spec = importlib.util.find_spec("patchright")
+        browsers_dir = _browsers_dir()
+        if spec is None or not spec.origin or browsers_dir is None:
+            return False
+        manifest = Path(spec.origin).parent / "driver" / "package" / "browsers.json"
+        with open(manifest, encoding="utf-8") as f:
+            browsers = json.load(f)["browsers"]
+        wanted = [
+            f"{b['name'].replace('-', '_')}-{b['revision']}"
+            for b in browsers
+            if b["name"] in _CHROMIUM_DOWNLOADS
+        ]
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    return bool(wanted) and all(
+        (browsers_dir / name / "INSTALLATION_COMPLETE").is_file() for name in wanted
+    )
+
+
 def install_patchright():
     """Install Patchright if missing. Prefers vendored wheel, then uv, then pip."""
     print("📦 Patchright not found. Installing...")
@@ -90,11 +136,14 @@ def install_patchright():
                 cwd=SKILL_DIR,
             )
 
-        subprocess.run(
-            [sys.executable, "-m", "patchright", "install", "chromium"],
-            check=True,
-            cwd=SKILL_DIR,
-        )
+        if is_chromium_installed():
+            print("  Chromium already installed, skipping browser download")
+        else:
+            subprocess.run(
+                [sys.executable, "-m", "patchright", "install", "chromium"],
+                check=True,
+                cwd=SKILL_DIR,
+            )
         print("✅ Patchright installed successfully")
         return True
     except subprocess.CalledProcessError as e:
@@ -125,7 +174,11 @@ def get_code_to_execute():
     # Case 3: Code from stdin
     if not sys.stdin.isatty():
         print("📥 Reading from stdin")
-        return sys.stdin.read()
+        # Raw bytes decoded in one call, skipping the text layer's incremental
+        # decoder; newlines are normalised as text mode would, since dedent
+        # treats a lone "\r" line as unindented
+        code = sys.stdin.buffer.read().decode("utf-8", errors="replace")
+        return code.replace("\r\n", "\n").replace("\r", "\n")
 
     # No input
     print("❌ No code to execute")
@@ -136,28 +189,14 @@ def get_code_to_execute():
     sys.exit(1)
 
 
-def cleanup_old_temp_files():
-    """Clean up old temporary execution files from previous runs"""
-    try:
-        temp_files = glob.glob(str(SKILL_DIR / ".temp-execution-*.py"))
-        for file_path in temp_files:
-            try:
-                os.unlink(file_path)
-            except Exception:
-                pass  # Ignore errors - file might be in use or already deleted
-    except Exception:
-        pass  # Ignore directory read errors
-
-
 def _indent_code(code, spaces):
     """Indent each line of code by the given number of spaces."""
     indent = ' ' * spaces
-    lines = code.split('\n')
-    # Strip common leading whitespace first, then re-indent
-    import textwrap
-    dedented = textwrap.dedent(code)
+    # Strip common leading whitespace first, then re-indent; blank lines stay
+    # empty. Split on '\n' only: str.splitlines() would also break inside
+    # string literals at characters such as '\x0c' or '\u2028'.
     return '\n'.join(indent + line if line.strip() else line
-                     for line in dedented.split('\n'))
+                     for line in textwrap.dedent(code).split('\n'))
 
 
 def _needs_auto_browser(code):
@@ -165,7 +204,8 @@ def _needs_auto_browser(code):
 
     Returns True when the code uses 'page' or 'browser' directly without
     creating its own via p.chromium.launch(). This lets simple inline tasks
-    skip all the boilerplate.
+    skip all the boilerplate. Substring-based; _classify_code() only falls
+    back to it for code that does not parse.
     """
     # If code explicitly launches or connects to a browser, it manages its own lifecycle
     if 'p.chromium.launch' in code or 'p.chromium.connect' in code:
@@ -181,34 +221,78 @@ def _needs_auto_browser(code):
     return False
 
 
-def wrap_code_if_needed(code):
-    """Wrap code in async function if not already wrapped.
+def _is_patchright_module(name):
+    return name == 'patchright' or name.startswith('patchright.')
 
-    Three modes:
-    1. Complete script (has imports + async def main): run as-is
-    2. Partial script (has imports, no wrapper): wrap in async main()
-    3. Inline snippet (no imports):
-       a. Uses page/browser directly: auto-configure browser, context, page
-       b. Uses p.chromium.launch: provide just playwright instance
-    """
-    # Check if code already has imports and async structure
-    has_import = "from patchright" in code or "import patchright" in code
-    has_async_main = "async def main" in code or "asyncio.run" in code
 
-    # If it's already a complete script, return as-is
-    if has_import and has_async_main:
-        return code
-
-    # If it's just Patchright commands, wrap in full template
-    if not has_import:
-        # Detect whether to provide auto-configured browser+page
-        auto_browser = _needs_auto_browser(code)
+def _classify_code(code):
+    """Work out how wrap_code_if_needed() should treat code, in one parse.
 
-        if auto_browser:
-            # Auto-configured mode: provides browser, context, page, config
-            # User code just does: await page.goto(...), print(await page.title()), etc.
-            indented = _indent_code(code, 12)
-            return f'''
+    Returns a dict of 'has_import', 'has_async_main' and 'auto_browser'
+    flags. Matching on the syntax tree means comments, strings and names
+    such as my_page are not mistaken for usage. Code that does not parse
+    falls back to the substring checks.
+    """
+    try:
+        tree = compile(textwrap.dedent(code), '<patchright-skill>', 'exec', _AST_FLAGS)
+    except (SyntaxError, ValueError):
+        return {
+            'has_import': "from patchright" in code or "import patchright" in code,
+            'has_async_main': "async def main" in code or "asyncio.run" in code,
+            'auto_browser': _needs_auto_browser(code),
+        }
+
+    has_import = has_async_main = manages_browser = False
+    uses_page = uses_browser = binds_own = False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            if any(_is_patchright_module(alias.name) for alias in node.names):
+                has_import = True
+        elif isinstance(node, ast.ImportFrom):
+            if _is_patchright_module(node.module or ''):
+                has_import = True
+        elif isinstance(node, ast.AsyncFunctionDef):
+            if node.name == 'main':
+                has_async_main = True
+        elif isinstance(node, ast.Attribute):
+            value = node.value
+            if isinstance(value, ast.Name):
+                if value.id == 'asyncio' and node.attr == 'run':
+                    has_async_main = True
+                elif value.id == 'browser':
+                    uses_browser = True
+            elif (
+                # p.chromium.launch*() / p.chromium.connect*() manage their own browser
+                isinstance(value, ast.Attribute)
+                and value.attr == 'chromium'
+                and isinstance(value.value, ast.Name)
+                and value.value.id == 'p'
+                and node.attr.startswith(('launch', 'connect'))
+            ):
+                manages_browser = True
+        elif isinstance(node, ast.Name):
+            if node.id == 'connect_to_persistent_session':
+                manages_browser = True
+            elif node.id in ('page', 'browser'):
+                if isinstance(node.ctx, ast.Store):
+                    # Code that binds page/browser itself sets up its own browser
+                    binds_own = True
+                elif node.id == 'page':
+                    uses_page = True
+
+    return {
+        'has_import': has_import,
+        'has_async_main': has_async_main,
+        'auto_browser': not (manages_browser or binds_own) and (uses_page or uses_browser),
+    }
+
+
+# Generated wrappers. The user's code, already indented, replaces the
+# _USER_CODE line; everything else is emitted verbatim.
+_USER_CODE = "__USER_CODE__"
+
+# Preamble shared by both inline snippet wrappers
+_SNIPPET_HEADER = '''
 import asyncio
 import os
 import sys
@@ -219,26 +303,37 @@ sys.path.insert(0, str(Path(__file__).parent.resolve()))
 
 from patchright.async_api import async_playwright
 from lib import helpers
-from lib.helpers import (
+'''
+
+# Auto-configured mode: provides browser, context, page, config
+# User code just does: await page.goto(...), print(await page.title()), etc.
+_AUTO_BROWSER_TEMPLATE = _SNIPPET_HEADER + '''from lib.helpers import (
     get_browser_config, extract_markdown, extract_text,
     extract_with_metadata, extract_content, take_screenshot,
     safe_click, safe_type, wait_for_page_ready, scroll_page,
     handle_cookie_banner, extract_table_data, stop_virtual_display,
+    connect_to_persistent_session, get_reusable_session_port,
 )
 
 async def main():
-    config = get_browser_config()
+    session_port = get_reusable_session_port()
+    config = None if session_port else get_browser_config()
     browser = None
     try:
         async with async_playwright() as p:
-            browser = await p.chromium.launch(**config['launch_options'])
-            context = await browser.new_context(**config['context_options'])
+            if session_port:
+                # Opted-in warm Chrome: isolated context, no browser cold start
+                browser = await connect_to_persistent_session(p, port=session_port)
+                context = await browser.new_context()
+            else:
+                browser = await p.chromium.launch(**config['launch_options'])
+                context = await browser.new_context(**config['context_options'])
             page = await context.new_page()
 
-{indented}
+__USER_CODE__
 
     except Exception as error:
-        print(f"❌ Automation error: {{error}}")
+        print(f"❌ Automation error: {error}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
@@ -254,21 +349,9 @@ async def main():
 if __name__ == "__main__":
     asyncio.run(main())
 '''
-        else:
-            # Manual mode: provides p (playwright), helpers, config helper
-            indented = _indent_code(code, 12)
-            return f'''
-import asyncio
-import os
-import sys
-from pathlib import Path
 
-# Add skill directory to path for helpers import
-sys.path.insert(0, str(Path(__file__).parent.resolve()))
-
-from patchright.async_api import async_playwright
-from lib import helpers
-from lib.helpers import get_browser_config, stop_virtual_display
+# Manual mode: provides p (playwright), helpers, config helper
+_MANUAL_TEMPLATE = _SNIPPET_HEADER + '''from lib.helpers import get_browser_config, stop_virtual_display
 from lib.persistent_session import (
     connect_to_persistent_session,
     is_persistent_session_running,
@@ -285,20 +368,20 @@ def get_context_options_with_headers(options=None):
     Use when creating contexts with raw Patchright API instead of helpers.create_context().
     """
     if options is None:
-        options = {{}}
+        options = {}
     if not __extra_headers:
         return options
 
-    merged_headers = {{**__extra_headers, **options.get('extra_http_headers', {{}})}}
-    return {{**options, 'extra_http_headers': merged_headers}}
+    merged_headers = {**__extra_headers, **options.get('extra_http_headers', {})}
+    return {**options, 'extra_http_headers': merged_headers}
 
 
 async def main():
     try:
         async with async_playwright() as p:
-{indented}
+__USER_CODE__
     except Exception as error:
-        print(f"❌ Automation error: {{error}}")
+        print(f"❌ Automation error: {error}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
@@ -310,18 +393,16 @@ if __name__ == "__main__":
     asyncio.run(main())
 '''
 
-    # If has import but no async wrapper
-    if not has_async_main:
-        indented = _indent_code(code, 8)
-        return f"""
+# Has imports but no async wrapper
+_ASYNC_MAIN_TEMPLATE = """
 import asyncio
 import sys
 
 async def main():
     try:
-{indented}
+__USER_CODE__
     except Exception as error:
-        print(f"❌ Automation error: {{error}}")
+        print(f"❌ Automation error: {error}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
@@ -331,52 +412,166 @@ if __name__ == "__main__":
     asyncio.run(main())
 """
 
+
+def wrap_code_if_needed(code):
+    """Wrap code in async function if not already wrapped.
+
+    Three modes:
+    1. Complete script (has imports + async def main): run as-is
+    2. Partial script (has imports, no wrapper): wrap in async main()
+    3. Inline snippet (no imports):
+       a. Uses page/browser directly: auto-configure browser, context, page
+       b. Uses p.chromium.launch: provide just playwright instance
+    """
+    # Check if code already has imports and async structure
+    flags = _classify_code(code)
+    has_import = flags['has_import']
+    has_async_main = flags['has_async_main']
+
+    # If it's already a complete script, return as-is
+    if has_import and has_async_main:
+        return code
+
+    # If it's just Patchright commands, wrap in full template
+    if not has_import:
+        # Detect whether to provide auto-configured browser+page
+        if flags['auto_browser']:
+            template = _AUTO_BROWSER_TEMPLATE
+        else:
+            template = _MANUAL_TEMPLATE
+        # Only the template's own sentinel is replaced, never one in user code
+        return template.replace(_USER_CODE, _indent_code(code, 12), 1)
+
+    # If has import but no async wrapper
+    if not has_async_main:
+        return _ASYNC_MAIN_TEMPLATE.replace(_USER_CODE, _indent_code(code, 8), 1)
+
     return code
 
 
+def _compile_code(code):
+    """Compile wrapped code under a filename in the skill directory.
+
+    The source is registered with linecache, so __file__-relative imports
+    and tracebacks behave as they did when it ran from a temp file.
+
+    Returns:
+        Tuple of (filename, code object)
+    """
+    filename = str(SKILL_DIR / ".inline-execution.py")
+    linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+    return filename, compile(code, filename, "exec")
+
+
+def _print_user_traceback(error):
+    """Print a traceback for error, starting at the user's code rather than this executor."""
+    import traceback
+
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_globals is globals():
+        tb = tb.tb_next
+    traceback.print_exception(type(error), error, tb)
+
+
+def execute_code(code):
+    """Run the wrapped code in this interpreter as the __main__ module."""
+    filename, code_obj = _compile_code(code)
+
+    module = types.ModuleType("__main__")
+    module.__file__ = filename
+    module.__builtins__ = __builtins__
+    sys.modules["__main__"] = module
+    sys.argv = [filename]
+    exec(code_obj, module.__dict__)
+
+
+# Event loop shared by run_code() calls, created on first use
+_runner = None
+
+
+def _run_coroutine(coro):
+    """Run coro on the process-wide event loop (a fresh loop before Python 3.11)."""
+    global _runner
+    if not hasattr(asyncio, "Runner"):
+        return asyncio.run(coro)
+    if _runner is None:
+        _runner = asyncio.Runner()
+        atexit.register(_runner.close)
+    return _runner.run(coro)
+
+
+def run_code(code):
+    """Wrap and run code in this process, for callers running many snippets.
+
+    Wrapped snippets have their main() driven on one event loop kept for
+    the life of the process, instead of a new asyncio.run() loop per call.
+    Complete scripts run unchanged, with their own event loop handling.
+    The code runs from the skill directory, as under main(), and the
+    caller's working directory is restored afterwards. Unlike main(),
+    sys.modules['__main__'] and sys.argv are left alone.
+
+    Returns:
+        Exit status: 0 on success, the SystemExit code if the code exits,
+        1 after printing the traceback of an uncaught exception.
+    """
+    wrapped = wrap_code_if_needed(code)
+    filename, code_obj = _compile_code(wrapped)
+    is_wrapped = wrapped != code
+    # Wrappers end in an "if __name__ == '__main__'" guard; a different name
+    # keeps it from starting a loop of its own
+    namespace = {
+        "__name__": "__patchright_skill__" if is_wrapped else "__main__",
+        "__file__": filename,
+        "__builtins__": __builtins__,
+    }
+    previous_cwd = os.getcwd()
+    os.chdir(SKILL_DIR)
+    try:
+        exec(code_obj, namespace)
+        if is_wrapped:
+            _run_coroutine(namespace["main"]())
+    except SystemExit as exit_:
+        if exit_.code is None or isinstance(exit_.code, int):
+            return exit_.code or 0
+        print(exit_.code, file=sys.stderr)
+        return 1
+    except Exception as error:
+        _print_user_traceback(error)
+        return 1
+    finally:
+        os.chdir(previous_cwd)
+    return 0
+
+
 def main():
     """Main execution"""
-    print("🎭 Patchright Skill - Universal Executor\n")
+    # Change to skill directory for proper module resolution
+    os.chdir(SKILL_DIR)
 
-    # Clean up old temp files from previous runs
-    cleanup_old_temp_files()
+    # Add skill directory to Python path
+    sys.path.insert(0, str(SKILL_DIR))
+
+    print("🎭 Patchright Skill - Universal Executor\n")
 
     # Check Patchright installation
     if not check_patchright_installed():
         installed = install_patchright()
         if not installed:
             sys.exit(1)
+        # Make the freshly installed package visible to this interpreter
+        importlib.invalidate_caches()
 
     # Get code to execute
     raw_code = get_code_to_execute()
     code = wrap_code_if_needed(raw_code)
 
-    # Create temporary file for execution
-    temp_file = SKILL_DIR / f".temp-execution-{os.getpid()}.py"
-
+    print("🚀 Starting automation...\n")
     try:
-        # Write code to temp file
-        with open(temp_file, "w") as f:
-            f.write(code)
-
-        # Execute the code
-        print("🚀 Starting automation...\n")
-        result = subprocess.run([sys.executable, str(temp_file)], cwd=SKILL_DIR)
-        sys.exit(result.returncode)
-
+        execute_code(code)
     except Exception as error:
-        print(f"❌ Execution failed: {error}")
-        import traceback
-
-        traceback.print_exc()
+        # Same report and exit status as an uncaught error in a standalone script
+        _print_user_traceback(error)
         sys.exit(1)
-    finally:
-        # Clean up temp file
-        try:
-            if temp_file.exists():
-                temp_file.unlink()
-        except Exception:
-            pass
 
 
 if __name__ == "__main__":
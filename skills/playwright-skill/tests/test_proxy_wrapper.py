@@ -10,9 +10,15 @@ from unittest import mock
 import pytest
 
 from lib.proxy_wrapper import (
+    _acquire_buffer,
+    _authority_host,
     _build_auth_header,
     _inject_auth_header,
+    _recv_head,
+    _release_buffer,
     _send_error,
+    _find_free_display,
+    _wait_for_display,
     _should_bypass_proxy,
     get_browser_config,
     get_proxy_config,
@@ -139,6 +145,36 @@ class TestShouldBypassProxy:
         cfg = _proxy_config(no_proxy=["  example.com  "])
         assert _should_bypass_proxy("example.com", cfg) is True
 
+    def test_ipv6_rule_matches_equivalent_spelling(self):
+        cfg = _proxy_config(no_proxy=["fd00::0001"])
+        assert _should_bypass_proxy("fd00::1", cfg) is True
+        assert _should_bypass_proxy("fd00::2", cfg) is False
+
+    def test_edited_pattern_list_takes_effect(self):
+        cfg = _proxy_config(no_proxy=["foo.com"])
+        assert _should_bypass_proxy("bar.com", cfg) is False
+        cfg["no_proxy"].append("bar.com")
+        assert _should_bypass_proxy("bar.com", cfg) is True
+
+
+# ===================================================================
+# _authority_host
+# ===================================================================
+
+class TestAuthorityHost:
+    def test_host_and_port(self):
+        assert _authority_host("Example.COM:443") == "example.com"
+
+    def test_host_without_port(self):
+        assert _authority_host("example.com") == "example.com"
+
+    def test_ipv6_brackets_stripped(self):
+        assert _authority_host("[::1]:443") == "::1"
+        assert _authority_host("[fd00::1]") == "fd00::1"
+
+    def test_unterminated_bracket(self):
+        assert _authority_host("[::1:443") == ""
+
 
 # ===================================================================
 # _build_auth_header
@@ -148,7 +184,7 @@ class TestBuildAuthHeader:
     def test_with_credentials(self):
         cfg = _proxy_config(username="alice", password="s3cret")
         header = _build_auth_header(cfg)
-        expected = "Basic " + base64.b64encode(b"alice:s3cret").decode()
+        expected = b"Basic " + base64.b64encode(b"alice:s3cret")
         assert header == expected
 
     def test_no_username(self):
@@ -170,38 +206,128 @@ class TestBuildAuthHeader:
 
 class TestInjectAuthHeader:
     def test_adds_auth_to_connect(self):
-        lines = ["CONNECT example.com:443 HTTP/1.1", "Host: example.com:443", ""]
-        result = _inject_auth_header(lines, "Basic abc123")
-        assert "Proxy-Authorization: Basic abc123\r\n" in result
-        assert result.startswith("CONNECT example.com:443 HTTP/1.1\r\n")
-        assert result.endswith("\r\n\r\n")
+        lines = [b"CONNECT example.com:443 HTTP/1.1", b"Host: example.com:443", b""]
+        result = _inject_auth_header(lines, b"Basic abc123")
+        assert b"Proxy-Authorization: Basic abc123\r\n" in result
+        assert result.startswith(b"CONNECT example.com:443 HTTP/1.1\r\n")
+        assert result.endswith(b"\r\n\r\n")
 
     def test_strips_existing_auth(self):
         lines = [
-            "CONNECT example.com:443 HTTP/1.1",
-            "Host: example.com:443",
-            "Proxy-Authorization: Basic old_value",
-            "",
+            b"CONNECT example.com:443 HTTP/1.1",
+            b"Host: example.com:443",
+            b"Proxy-Authorization: Basic old_value",
+            b"",
         ]
-        result = _inject_auth_header(lines, "Basic new_value")
-        assert "old_value" not in result
-        assert "Proxy-Authorization: Basic new_value\r\n" in result
+        result = _inject_auth_header(lines, b"Basic new_value")
+        assert b"old_value" not in result
+        assert b"Proxy-Authorization: Basic new_value\r\n" in result
 
     def test_strips_existing_auth_case_insensitive(self):
         lines = [
-            "GET http://example.com/ HTTP/1.1",
-            "proxy-authorization: Basic OLD",
-            "",
+            b"GET http://example.com/ HTTP/1.1",
+            b"proxy-authorization: Basic OLD",
+            b"",
+        ]
+        result = _inject_auth_header(lines, b"Basic NEW")
+        assert b"OLD" not in result
+        assert b"Proxy-Authorization: Basic NEW\r\n" in result
+
+    def test_keeps_headers_that_only_share_the_prefix(self):
+        lines = [
+            b"GET http://example.com/ HTTP/1.1",
+            b"Proxy-Authorization-Hint: keep",
+            b"X-Proxy-Authorization: keep",
+            b"Proxy-Authorization:Basic OLD",
+            b"",
         ]
-        result = _inject_auth_header(lines, "Basic NEW")
-        assert "OLD" not in result
-        assert "Proxy-Authorization: Basic NEW\r\n" in result
+        result = _inject_auth_header(lines, b"Basic NEW")
+        assert result.count(b"keep") == 2
+        assert b"OLD" not in result
 
     def test_no_auth_header_when_none(self):
-        lines = ["CONNECT example.com:443 HTTP/1.1", "Host: example.com:443", ""]
+        lines = [b"CONNECT example.com:443 HTTP/1.1", b"Host: example.com:443", b""]
         result = _inject_auth_header(lines, None)
-        assert "Proxy-Authorization" not in result
-        assert result.endswith("\r\n\r\n")
+        assert b"Proxy-Authorization" not in result
+        assert result.endswith(b"\r\n\r\n")
+
+    def test_request_line_only(self):
+        result = _inject_auth_header([b"CONNECT example.com:443 HTTP/1.1"], b"Basic abc")
+        assert result == b"CONNECT example.com:443 HTTP/1.1\r\nProxy-Authorization: Basic abc\r\n\r\n"
+
+
+# ===================================================================
+# _acquire_buffer / _release_buffer
+# ===================================================================
+
+class TestBufferPool:
+    def test_released_buffer_is_reused(self):
+        buf = _acquire_buffer()
+        _release_buffer(buf)
+        assert _acquire_buffer() is buf
+
+    def test_pool_size_is_capped(self):
+        import lib.proxy_wrapper as pw
+
+        bufs = [_acquire_buffer() for _ in range(pw._BUFFER_POOL_SIZE + 5)]
+        for buf in bufs:
+            _release_buffer(buf)
+        assert len(pw._buffer_pool) == pw._BUFFER_POOL_SIZE
+
+
+# ===================================================================
+# _recv_head
+# ===================================================================
+
+class TestRecvHead:
+    def test_stops_at_end_of_head(self):
+        client, server = socket.socketpair()
+        try:
+            client.sendall(b"CONNECT a:443 HTTP/1.1\r\n\r\n")
+            buf = bytearray(1024)
+            size = _recv_head(server, buf)
+            assert bytes(buf[:size]) == b"CONNECT a:443 HTTP/1.1\r\n\r\n"
+        finally:
+            client.close()
+            server.close()
+
+    def test_terminator_split_across_reads(self):
+        client, server = socket.socketpair()
+        try:
+            def send_in_pieces():
+                for piece in (b"HTTP/1.1 200 OK\r", b"\n\r", b"\n"):
+                    client.sendall(piece)
+                    time.sleep(0.05)
+
+            sender = threading.Thread(target=send_in_pieces)
+            sender.start()
+            buf = bytearray(1024)
+            size = _recv_head(server, buf)
+            sender.join()
+            assert bytes(buf[:size]) == b"HTTP/1.1 200 OK\r\n\r\n"
+        finally:
+            client.close()
+            server.close()
+
+    def test_returns_partial_head_on_eof(self):
+        client, server = socket.socketpair()
+        try:
+            client.sendall(b"GET / HTTP/1.1\r\n")
+            client.close()
+            buf = bytearray(1024)
+            assert _recv_head(server, buf) == len(b"GET / HTTP/1.1\r\n")
+        finally:
+            server.close()
+
+    def test_stops_when_buffer_full(self):
+        client, server = socket.socketpair()
+        try:
+            client.sendall(b"x" * 100)
+            buf = bytearray(16)
+            assert _recv_head(server, buf) == 16
+        finally:
+            client.close()
+            server.close()
 
 
 # ===================================================================
@@ -280,6 +406,22 @@ class TestGetProxyConfig:
         with mock.patch.dict(os.environ, env, clear=True):
             assert get_proxy_config() is None
 
+    def test_repeat_calls_return_independent_dicts(self):
+        env = {"HTTPS_PROXY": "http://u:p@proxy:8080", "NO_PROXY": "foo.com"}
+        with mock.patch.dict(os.environ, env, clear=True):
+            first = get_proxy_config()
+            first["no_proxy"].append("bar.com")
+            first["host"] = "changed"
+            second = get_proxy_config()
+            assert second["host"] == "proxy"
+            assert second["no_proxy"] == ["foo.com"]
+
+    def test_picks_up_environment_changes(self):
+        with mock.patch.dict(os.environ, {"HTTPS_PROXY": "http://u:p@proxy-a:8080"}, clear=True):
+            assert get_proxy_config()["host"] == "proxy-a"
+        with mock.patch.dict(os.environ, {"HTTPS_PROXY": "http://u:p@proxy-b:8080"}, clear=True):
+            assert get_proxy_config()["host"] == "proxy-b"
+
     def test_lowercase_env_vars(self):
         env = {
             "https_proxy": "http://u:p@proxy:8080",
@@ -336,6 +478,62 @@ class TestIsClaudeCodeRemoteEnvironment:
             assert is_claude_code_web_environment() is False
 
 
+# ===================================================================
+# _find_free_display
+# ===================================================================
+
+class TestFindFreeDisplay:
+    def _patch_dirs(self, tmp_path):
+        socket_dir = tmp_path / ".X11-unix"
+        socket_dir.mkdir()
+        return socket_dir, mock.patch.multiple(
+            "lib.proxy_wrapper",
+            _X_LOCK_DIR=str(tmp_path),
+            _X_SOCKET_DIR=str(socket_dir),
+        )
+
+    def test_first_display_when_none_in_use(self, tmp_path):
+        _, patch = self._patch_dirs(tmp_path)
+        with patch:
+            assert _find_free_display() == 99
+
+    def test_skips_locked_and_socket_displays(self, tmp_path):
+        socket_dir, patch = self._patch_dirs(tmp_path)
+        (tmp_path / ".X99-lock").touch()
+        (socket_dir / "X100").touch()
+        (tmp_path / ".X101-lock.tmp").touch()  # not a lock file
+        with patch:
+            assert _find_free_display() == 101
+
+    def test_missing_directories(self, tmp_path):
+        with mock.patch.multiple(
+            "lib.proxy_wrapper",
+            _X_LOCK_DIR=str(tmp_path / "missing"),
+            _X_SOCKET_DIR=str(tmp_path / "missing" / ".X11-unix"),
+        ):
+            assert _find_free_display() == 99
+
+
+class TestWaitForDisplay:
+    def test_ready_once_socket_appears(self, tmp_path):
+        (tmp_path / "X99").touch()
+        process = mock.Mock(**{"poll.return_value": None})
+        with mock.patch("lib.proxy_wrapper._X_SOCKET_DIR", str(tmp_path)):
+            started = time.monotonic()
+            assert _wait_for_display(process, 99) is True
+            assert time.monotonic() - started < 0.5
+
+    def test_not_ready_when_process_exits(self, tmp_path):
+        process = mock.Mock(**{"poll.return_value": 1})
+        with mock.patch("lib.proxy_wrapper._X_SOCKET_DIR", str(tmp_path)):
+            assert _wait_for_display(process, 99) is False
+
+    def test_running_process_counts_as_ready_after_timeout(self, tmp_path):
+        process = mock.Mock(**{"poll.return_value": None})
+        with mock.patch("lib.proxy_wrapper._X_SOCKET_DIR", str(tmp_path)):
+            assert _wait_for_display(process, 99, timeout=0.05) is True
+
+
 # ===================================================================
 # get_browser_config
 # ===================================================================
@@ -367,6 +565,28 @@ class TestGetBrowserConfig:
             assert cfg["proxy_wrapper_used"] is True
             assert cfg["launch_options"]["proxy"] == {"server": "http://127.0.0.1:5555"}
 
+    def test_headed_with_existing_display_inherits_env(self):
+        env = {"CLAUDE_CODE_REMOTE": "true", "DISPLAY": ":0"}
+        with mock.patch.dict(os.environ, env, clear=True), \
+                mock.patch("lib.proxy_wrapper._xvfb_process", None):
+            cfg = get_browser_config(headless=False, verbose=False)
+            assert cfg["launch_options"]["headless"] is False
+            assert "env" not in cfg["launch_options"]
+
+    def test_headed_with_started_xvfb_passes_display(self):
+        env = {"CLAUDE_CODE_REMOTE": "true"}
+
+        def fake_ensure_virtual_display(verbose=True):
+            os.environ["DISPLAY"] = ":99"
+            return True
+
+        with mock.patch.dict(os.environ, env, clear=True), \
+                mock.patch("lib.proxy_wrapper._xvfb_process", mock.Mock()), \
+                mock.patch("lib.proxy_wrapper.ensure_virtual_display", fake_ensure_virtual_display):
+            cfg = get_browser_config(headless=False, verbose=False)
+            assert cfg["launch_options"]["headless"] is False
+            assert cfg["launch_options"]["env"]["DISPLAY"] == ":99"
+
     def test_local_env_no_cert_handling(self):
         with mock.patch.dict(os.environ, {}, clear=True):
             cfg = get_browser_config(verbose=False)
@@ -423,6 +643,64 @@ class TestProxyWrapperLifecycle:
         assert pw._wrapper_thread is None
         assert pw._wrapper_port is None
 
+    def test_stop_ends_accept_thread_promptly(self):
+        import lib.proxy_wrapper as pw
+
+        start_proxy_wrapper(_proxy_config(), verbose=False)
+        accept_thread = pw._wrapper_thread
+        started = time.monotonic()
+        stop_proxy_wrapper()
+        assert not accept_thread.is_alive()
+        assert time.monotonic() - started < 1
+
+    def test_resolves_upstream_once(self):
+        cfg = _proxy_config()
+        cfg["host"] = "127.0.0.1"
+        with mock.patch(
+            "lib.proxy_wrapper.socket.getaddrinfo", wraps=socket.getaddrinfo
+        ) as getaddrinfo:
+            result = start_proxy_wrapper(cfg, verbose=False)
+            wrapper_port = int(result["server"].rsplit(":", 1)[1])
+            for _ in range(3):
+                # Plain connect() to an IP literal, so the test itself never calls getaddrinfo
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.settimeout(2)
+                sock.connect(("127.0.0.1", wrapper_port))
+                sock.sendall(b"CONNECT example.com:443 HTTP/1.1\r\n\r\n")
+                _recv_all(sock, timeout=2)
+                sock.close()
+        assert getaddrinfo.call_count == 1
+        assert "upstream_addr" not in cfg
+
+    def test_worker_threads_are_bounded_and_reused(self):
+        import lib.proxy_wrapper as pw
+
+        pool = pw._WorkerPool(2, "test-pool")
+        started = threading.Barrier(3, timeout=2)
+        release = threading.Event()
+        done = []
+
+        def task(i):
+            if i < 2:
+                started.wait()
+                release.wait(2)
+            done.append(i)
+
+        try:
+            for i in range(5):
+                pool.submit(task, i)
+            started.wait()
+            assert len(pool._threads) == 2
+            release.set()
+            deadline = time.monotonic() + 2
+            while len(done) < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert sorted(done) == [0, 1, 2, 3, 4]
+            assert len(pool._threads) == 2
+            assert all(t.daemon for t in pool._threads)
+        finally:
+            pool.shutdown()
+
     def test_can_restart_after_stop(self):
         cfg = _proxy_config()
         r1 = start_proxy_wrapper(cfg, verbose=False)
@@ -502,11 +780,154 @@ class TestHandleClientIntegration:
             upstream_server.close()
             stop_proxy_wrapper()
 
+    def test_idle_connections_do_not_starve_handshakes(self):
+        """More idle clients than handshake workers cannot block a real CONNECT."""
+        import lib.proxy_wrapper as pw
+
+        def upstream_handler(client):
+            _recv_all(client, timeout=0.5)
+            client.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            time.sleep(0.5)
+            client.close()
+
+        upstream_server, upstream_port = self._start_mock_upstream(upstream_handler)
+        idle = []
+        try:
+            cfg = _proxy_config()
+            cfg["host"] = "127.0.0.1"
+            cfg["port"] = upstream_port
+
+            stop_proxy_wrapper()
+            with mock.patch.object(pw, "_HEAD_READ_TIMEOUT", 0.3):
+                result = start_proxy_wrapper(cfg, verbose=False)
+                wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+                # Speculative connections that never send a request
+                for _ in range(pw._HANDSHAKE_WORKERS + 6):
+                    idle.append(socket.create_connection(("127.0.0.1", wrapper_port), timeout=5))
+
+                sock = socket.create_connection(("127.0.0.1", wrapper_port), timeout=5)
+                try:
+                    sock.sendall(b"CONNECT example.com:443 HTTP/1.1\r\nHost: example.com:443\r\n\r\n")
+                    assert sock.recv(4096).startswith(b"HTTP/1.1 200")
+                finally:
+                    sock.close()
+
+                # The idle clients are dropped once their read times out
+                assert idle[0].recv(1) == b""
+        finally:
+            for s in idle:
+                s.close()
+            upstream_server.close()
+            stop_proxy_wrapper()
+
+    def test_connect_rejection_mentioning_200_closes_tunnel(self):
+        """Only a 200 status line opens the tunnel, not a '200' elsewhere in the reply."""
+        def upstream_handler(client):
+            client.recv(4096)
+            client.sendall(b"HTTP/1.1 407 Denied\r\nX-Retry: 200\r\n\r\n")
+            # Hold the upstream side open; the wrapper must close the client itself
+            time.sleep(3)
+            client.close()
+
+        upstream_server, upstream_port = self._start_mock_upstream(upstream_handler)
+        try:
+            cfg = _proxy_config()
+            cfg["host"] = "127.0.0.1"
+            cfg["port"] = upstream_port
+
+            stop_proxy_wrapper()
+            result = start_proxy_wrapper(cfg, verbose=False)
+            wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+            sock = socket.create_connection(("127.0.0.1", wrapper_port), timeout=2)
+            try:
+                sock.sendall(b"CONNECT example.com:443 HTTP/1.1\r\nHost: example.com:443\r\n\r\n")
+                response = b""
+                while True:
+                    chunk = sock.recv(4096)  # raises socket.timeout if left open
+                    if not chunk:
+                        break
+                    response += chunk
+                assert response.startswith(b"HTTP/1.1 407")
+            finally:
+                sock.close()
+        finally:
+            upstream_server.close()
+            stop_proxy_wrapper()
+
+    @pytest.mark.parametrize("use_splice", [
+        pytest.param(True, marks=pytest.mark.skipif(not hasattr(os, "splice"), reason="needs os.splice")),
+        False,
+    ])
+    def test_connect_tunnel_forwards_both_directions(self, use_splice):
+        """Bytes flow both ways through an established tunnel, bulk transfers included."""
+        def upstream_handler(client):
+            head = b""
+            while b"\r\n\r\n" not in head:
+                chunk = client.recv(4096)
+                if not chunk:
+                    client.close()
+                    return
+                head += chunk
+            client.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            # Echo everything back until the tunnel closes
+            while True:
+                data = client.recv(65536)
+                if not data:
+                    break
+                client.sendall(data)
+            client.close()
+
+        payload = os.urandom(2 * 1024 * 1024)
+        upstream_server, upstream_port = self._start_mock_upstream(upstream_handler)
+        try:
+            cfg = _proxy_config()
+            cfg["host"] = "127.0.0.1"
+            cfg["port"] = upstream_port
+
+            stop_proxy_wrapper()
+            result = start_proxy_wrapper(cfg, verbose=False)
+            wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+            with mock.patch("lib.proxy_wrapper._USE_SPLICE", use_splice):
+                echoed = self._echo_through_tunnel(wrapper_port, payload)
+            assert echoed == payload
+        finally:
+            upstream_server.close()
+            stop_proxy_wrapper()
+
+    def _echo_through_tunnel(self, wrapper_port, payload):
+        """Open a CONNECT tunnel, stream payload through it and return what comes back."""
+        sock = socket.create_connection(("127.0.0.1", wrapper_port), timeout=5)
+        try:
+            sock.sendall(b"CONNECT example.com:443 HTTP/1.1\r\nHost: example.com:443\r\n\r\n")
+            reply = b""
+            while b"\r\n\r\n" not in reply:
+                reply += sock.recv(4096)
+            assert reply.startswith(b"HTTP/1.1 200")
+
+            sender = threading.Thread(target=sock.sendall, args=(payload,), daemon=True)
+            sender.start()
+            echoed = bytearray()
+            while len(echoed) < len(payload):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                echoed += chunk
+            sender.join(timeout=5)
+            return bytes(echoed)
+        finally:
+            sock.close()
+
     def test_http_get_with_auth(self):
         """Plain HTTP GET gets auth header injected and response streamed back."""
+        received = {}
+
         def upstream_handler(client):
             data = _recv_all(client, timeout=1)
             req = data.decode("utf-8", errors="ignore")
+            received["request"] = req
             # Verify auth was injected
             assert "Proxy-Authorization: Basic" in req
             body = b"Hello from upstream"
@@ -528,11 +949,78 @@ class TestHandleClientIntegration:
             result = start_proxy_wrapper(cfg, verbose=False)
             wrapper_port = int(result["server"].rsplit(":", 1)[1])
 
-            request = b"GET http://example.com/ HTTP/1.1\r\nHost: example.com\r\n\r\n"
+            request = (
+                b"GET http://example.com/ HTTP/1.1\r\nHost: example.com\r\n"
+                b"Proxy-Connection: keep-alive\r\n\r\n"
+            )
             response = self._send_request_to_wrapper(wrapper_port, request)
 
             assert b"200 OK" in response
             assert b"Hello from upstream" in response
+            # One request per connection: upstream is asked to close after responding
+            assert "Connection: close\r\n" in received["request"]
+            assert "keep-alive" not in received["request"]
+        finally:
+            upstream_server.close()
+            stop_proxy_wrapper()
+
+    def test_http_post_body_forwarded_with_head(self):
+        """Body bytes read with the request head follow the rewritten head upstream."""
+        received = {}
+
+        def upstream_handler(client):
+            received["request"] = _recv_all(client, timeout=1)
+            client.sendall(b"HTTP/1.1 204 No Content\r\n\r\n")
+            client.close()
+
+        upstream_server, upstream_port = self._start_mock_upstream(upstream_handler)
+        try:
+            cfg = _proxy_config(username="u", password="p")
+            cfg["host"] = "127.0.0.1"
+            cfg["port"] = upstream_port
+
+            stop_proxy_wrapper()
+            result = start_proxy_wrapper(cfg, verbose=False)
+            wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+            request = (
+                b"POST http://example.com/form HTTP/1.1\r\nHost: example.com\r\n"
+                b"Content-Length: 7\r\n\r\na=1&b=2"
+            )
+            response = self._send_request_to_wrapper(wrapper_port, request)
+
+            assert b"204" in response
+            head, _, body = received["request"].partition(b"\r\n\r\n")
+            assert b"Proxy-Authorization: Basic" in head
+            assert body == b"a=1&b=2"
+        finally:
+            upstream_server.close()
+            stop_proxy_wrapper()
+
+    def test_http_large_response_streamed(self):
+        """Responses larger than the socket buffers are relayed intact."""
+        body = os.urandom(4 * 1024 * 1024)
+
+        def upstream_handler(client):
+            _recv_all(client, timeout=0.5)
+            client.sendall(
+                b"HTTP/1.1 200 OK\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            client.close()
+
+        upstream_server, upstream_port = self._start_mock_upstream(upstream_handler)
+        try:
+            cfg = _proxy_config()
+            cfg["host"] = "127.0.0.1"
+            cfg["port"] = upstream_port
+
+            stop_proxy_wrapper()
+            result = start_proxy_wrapper(cfg, verbose=False)
+            wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+            request = b"GET http://example.com/big HTTP/1.1\r\nHost: example.com\r\n\r\n"
+            response = self._send_request_to_wrapper(wrapper_port, request)
+            assert response.endswith(body)
         finally:
             upstream_server.close()
             stop_proxy_wrapper()
@@ -571,6 +1059,23 @@ class TestHandleClientIntegration:
         finally:
             stop_proxy_wrapper()
 
+    def test_ipv6_localhost_connect_bypassed_via_wrapper(self):
+        """Bracketed IPv6 loopback CONNECT targets are recognised as localhost."""
+        cfg = _proxy_config(no_proxy=[])
+        cfg["host"] = "127.0.0.1"
+        cfg["port"] = 1
+
+        stop_proxy_wrapper()
+        result = start_proxy_wrapper(cfg, verbose=False)
+        wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+        try:
+            request = b"CONNECT [::1]:8080 HTTP/1.1\r\nHost: [::1]:8080\r\n\r\n"
+            response = self._send_request_to_wrapper(wrapper_port, request)
+            assert b"Direct connection not supported" in response
+        finally:
+            stop_proxy_wrapper()
+
     def test_upstream_timeout_returns_504(self):
         """When upstream proxy doesn't respond, client gets 504."""
         # Start a server that accepts but never responds
@@ -641,6 +1146,27 @@ class TestHandleClientIntegration:
         finally:
             stop_proxy_wrapper()
 
+    def test_oversized_request_head_returns_431(self):
+        """A head that does not fit the forwarding buffer is rejected, not truncated."""
+        import lib.proxy_wrapper as pw
+
+        cfg = _proxy_config()
+        cfg["host"] = "127.0.0.1"
+        cfg["port"] = 1
+
+        stop_proxy_wrapper()
+        result = start_proxy_wrapper(cfg, verbose=False)
+        wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+        try:
+            # Exactly fills the buffer, so nothing is left unread to trigger a reset
+            request = b"GET http://example.com/ HTTP/1.1\r\nX-Big: "
+            request += b"a" * (pw._TUNNEL_CHUNK - len(request))
+            response = self._send_request_to_wrapper(wrapper_port, request)
+            assert b"431" in response
+        finally:
+            stop_proxy_wrapper()
+
     def test_malformed_request_returns_400(self):
         """A request with an empty first line returns 400."""
         cfg = _proxy_config()
@@ -657,3 +1183,42 @@ class TestHandleClientIntegration:
             assert b"400" in response
         finally:
             stop_proxy_wrapper()
+
+    def test_stop_during_handshake_does_not_restart_reactor(self):
+        """A CONNECT that completes after stop is closed, not handed to a new reactor."""
+        import lib.proxy_wrapper as pw
+
+        def slow_upstream(client):
+            _recv_all(client, timeout=0.3)
+            client.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            time.sleep(1)
+            client.close()
+
+        upstream_server, upstream_port = self._start_mock_upstream(slow_upstream)
+        try:
+            cfg = _proxy_config()
+            cfg["host"] = "127.0.0.1"
+            cfg["port"] = upstream_port
+
+            stop_proxy_wrapper()
+            result = start_proxy_wrapper(cfg, verbose=False)
+            wrapper_port = int(result["server"].rsplit(":", 1)[1])
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(2)
+            sock.connect(("127.0.0.1", wrapper_port))
+            sock.sendall(b"CONNECT example.com:443 HTTP/1.1\r\nHost: example.com:443\r\n\r\n")
+            time.sleep(0.1)
+            stop_proxy_wrapper()
+
+            # The worker gets the upstream reply after stop and must drop the tunnel
+            response = _recv_all(sock, timeout=2)
+            sock.close()
+            assert b"200" in response
+            assert pw._tunnel_reactor is None
+            assert not any(
+                t.name == "proxy-wrapper-tunnels" and t.is_alive() for t in threading.enumerate()
+            )
+        finally:
+            upstream_server.close()
+            stop_proxy_wrapper()
@@ -0,0 +1,286 @@
+"""Tests for the universal executor's code wrapping."""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import types
+from unittest import mock
+
+import pytest
+
+import run
+from run import _classify_code, run_code, wrap_code_if_needed
+
+
+# ===================================================================
+# _classify_code
+# ===================================================================
+
+class TestClassifyCode:
+    def test_complete_script(self):
+        code = (
+            "import asyncio\n"
+            "from patchright.async_api import async_playwright\n"
+            "async def main():\n"
+            "    pass\n"
+            "asyncio.run(main())\n"
+        )
+        flags = _classify_code(code)
+        assert flags["has_import"] is True
+        assert flags["has_async_main"] is True
+
+    def test_inline_page_snippet_uses_auto_browser(self):
+        flags = _classify_code("await page.goto('https://example.com')\nprint(await page.title())")
+        assert flags == {"has_import": False, "has_async_main": False, "auto_browser": True}
+
+    def test_indented_snippet_is_parsed(self):
+        flags = _classify_code("    await page.goto('https://example.com')\n")
+        assert flags["auto_browser"] is True
+
+    def test_own_launch_is_manual(self):
+        code = "browser = await p.chromium.launch()\npage = await browser.new_page()"
+        assert _classify_code(code)["auto_browser"] is False
+
+    def test_persistent_session_is_manual(self):
+        code = "browser = await connect_to_persistent_session(p)\nawait browser.close()"
+        assert _classify_code(code)["auto_browser"] is False
+
+    def test_helpers_example_from_skill_md_is_manual(self):
+        # The "Available Helpers" example in SKILL.md creates its own browser and page
+        code = (
+            "import sys\n"
+            "sys.path.insert(0, '$SKILL_DIR')\n"
+            "from lib import helpers\n"
+            "servers = await helpers.detect_dev_servers()\n"
+            "browser = await helpers.launch_browser(p)\n"
+            "context = await helpers.create_context(browser)\n"
+            "page = await context.new_page()\n"
+            "await helpers.safe_click(page, 'button.submit', {'retries': 3})\n"
+            "await helpers.take_screenshot(page, 'test-result')\n"
+        )
+        assert _classify_code(code)["auto_browser"] is False
+        wrapped = wrap_code_if_needed(code)
+        assert "get_browser_config()" not in wrapped
+        assert "async with async_playwright() as p:" in wrapped
+
+    @pytest.mark.parametrize("code", [
+        "page = await browser.new_page()\nawait page.goto('x')",
+        "async with other() as browser:\n    await browser.new_page()",
+    ])
+    def test_binding_page_or_browser_is_manual(self, code):
+        assert _classify_code(code)["auto_browser"] is False
+
+    def test_bare_browser_uses_auto_browser(self):
+        assert _classify_code("print(browser.version)")["auto_browser"] is True
+
+    @pytest.mark.parametrize("code", [
+        "# page.goto('x') is commented out\nprint('hi')",
+        "print('import patchright')",
+        "my_page.goto('x')",
+    ])
+    def test_comments_strings_and_other_names_ignored(self, code):
+        flags = _classify_code(code)
+        assert flags["has_import"] is False
+        assert flags["auto_browser"] is False
+
+    def test_unparseable_code_falls_back_to_substrings(self):
+        flags = _classify_code("await page.goto('x'")
+        assert flags["auto_browser"] is True
+
+
+# ===================================================================
+# wrap_code_if_needed
+# ===================================================================
+
+class TestWrapCodeIfNeeded:
+    def test_complete_script_unchanged(self):
+        code = "import patchright\nasync def main():\n    pass\n"
+        assert wrap_code_if_needed(code) == code
+
+    def test_auto_browser_wrapper_compiles(self):
+        wrapped = wrap_code_if_needed("await page.goto('x')\nprint({'a': 1})")
+        assert "page = await context.new_page()" in wrapped
+        compile(wrapped, "<wrapped>", "exec")
+
+    def test_manual_wrapper_compiles(self):
+        wrapped = wrap_code_if_needed("browser = await p.chromium.launch()\nawait browser.close()")
+        assert "async with async_playwright() as p:" in wrapped
+        assert "page = await context.new_page()" not in wrapped
+        compile(wrapped, "<wrapped>", "exec")
+
+    def test_sentinel_in_user_code_is_kept(self):
+        wrapped = wrap_code_if_needed("await page.goto('__USER_CODE__')")
+        assert "await page.goto('__USER_CODE__')" in wrapped
+
+
+# ===================================================================
+# _indent_code
+# ===================================================================
+
+def _baseline_indent(code, spaces):
+    """_indent_code() as originally written, for comparison."""
+    indent = ' ' * spaces
+    dedented = textwrap.dedent(code)
+    return '\n'.join(indent + line if line.strip() else line
+                     for line in dedented.split('\n'))
+
+
+class TestIndentCode:
+    @pytest.mark.parametrize("code", [
+        "await page.goto('a\x0cb')\n",
+        "print('a\x0bb\x1cc\x1dd\x1ee')\n",
+        "print('a\x85b\u2028c\u2029d')\n",
+        "    x = 1\n\n    if x:\n        print(x)\n",
+        "a\n   \nb",
+    ])
+    def test_matches_baseline(self, code):
+        assert run._indent_code(code, 12) == _baseline_indent(code, 12)
+
+    def test_line_separators_inside_strings_not_indented(self):
+        wrapped = wrap_code_if_needed("await page.goto('a\x0cb')\n")
+        assert "await page.goto('a\x0cb')" in wrapped
+
+
+# ===================================================================
+# get_code_to_execute
+# ===================================================================
+
+class TestGetCodeFromStdin:
+    def _read(self, data, monkeypatch):
+        stdin = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+        monkeypatch.setattr(sys, "stdin", stdin)
+        monkeypatch.setattr(sys, "argv", ["run.py"])
+        return run.get_code_to_execute()
+
+    def test_crlf_newlines_normalised(self, monkeypatch):
+        code = self._read(b"    await page.goto('x')\r\n\r\n    print(1)\r\n", monkeypatch)
+        assert code == "    await page.goto('x')\n\n    print(1)\n"
+
+    def test_crlf_indented_snippet_wraps_and_compiles(self, monkeypatch):
+        code = self._read(b"    await page.goto('x')\r\n\r\n    print(1)\r\n", monkeypatch)
+        compile(wrap_code_if_needed(code), "<wrapped>", "exec")
+
+    def test_lone_cr_newlines_normalised(self, monkeypatch):
+        assert self._read(b"print(1)\rprint(2)\r", monkeypatch) == "print(1)\nprint(2)\n"
+
+
+# ===================================================================
+# is_chromium_installed
+# ===================================================================
+
+class TestIsChromiumInstalled:
+    @pytest.fixture
+    def browsers_dir(self, tmp_path, monkeypatch):
+        """Fake installed patchright pinning chromium 1200, with an empty browsers dir."""
+        package = tmp_path / "site" / "patchright"
+        (package / "driver" / "package").mkdir(parents=True)
+        (package / "__init__.py").write_text("")
+        (package / "driver" / "package" / "browsers.json").write_text(json.dumps({
+            "browsers": [
+                {"name": "chromium", "revision": "1200"},
+                {"name": "chromium-headless-shell", "revision": "1200"},
+                {"name": "firefox", "revision": "1500"},
+            ]
+        }))
+        monkeypatch.syspath_prepend(str(tmp_path / "site"))
+        monkeypatch.delitem(sys.modules, "patchright", raising=False)
+
+        browsers = tmp_path / "browsers"
+        browsers.mkdir()
+        monkeypatch.setenv("PLAYWRIGHT_BROWSERS_PATH", str(browsers))
+        return browsers
+
+    def _install(self, browsers_dir, name):
+        (browsers_dir / name).mkdir()
+        (browsers_dir / name / "INSTALLATION_COMPLETE").write_text("")
+
+    def test_missing_browsers(self, browsers_dir):
+        assert run.is_chromium_installed() is False
+
+    def test_all_pinned_builds_present(self, browsers_dir):
+        self._install(browsers_dir, "chromium-1200")
+        self._install(browsers_dir, "chromium_headless_shell-1200")
+        assert run.is_chromium_installed() is True
+
+    def test_other_revision_does_not_count(self, browsers_dir):
+        self._install(browsers_dir, "chromium-1100")
+        self._install(browsers_dir, "chromium_headless_shell-1200")
+        assert run.is_chromium_installed() is False
+
+    def test_incomplete_download_does_not_count(self, browsers_dir):
+        (browsers_dir / "chromium-1200").mkdir()
+        self._install(browsers_dir, "chromium_headless_shell-1200")
+        assert run.is_chromium_installed() is False
+
+    def test_in_package_browsers_path(self, browsers_dir, monkeypatch):
+        monkeypatch.setenv("PLAYWRIGHT_BROWSERS_PATH", "0")
+        assert run.is_chromium_installed() is False
+
+
+# ===================================================================
+# run_code
+# ===================================================================
+
+@pytest.fixture
+def fake_patchright():
+    """Stand-in patchright whose async_playwright() yields a placeholder."""
+    @contextlib.asynccontextmanager
+    async def async_playwright():
+        yield object()
+
+    package = types.ModuleType("patchright")
+    async_api = types.ModuleType("patchright.async_api")
+    async_api.async_playwright = async_playwright
+    package.async_api = async_api
+    with mock.patch.dict(sys.modules, {"patchright": package, "patchright.async_api": async_api}):
+        yield
+
+
+class TestRunCode:
+    def test_import_leaves_cwd_unchanged(self, tmp_path):
+        probe = (
+            "import os, sys\n"
+            f"sys.path.insert(0, {str(run.SKILL_DIR)!r})\n"
+            "before = os.getcwd()\n"
+            "import run\n"
+            "print(os.getcwd() == before)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", probe], cwd=tmp_path, capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "True"
+
+    def test_cwd_is_skill_dir_only_during_call(self, fake_patchright, capsys, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        assert run_code("import os\nprint('cwd', os.getcwd())") == 0
+        assert f"cwd {run.SKILL_DIR}" in capsys.readouterr().out
+        assert os.getcwd() == str(tmp_path)
+
+    def test_snippet_runs_in_wrapper(self, fake_patchright, capsys):
+        assert run_code("print('from snippet', p is not None)") == 0
+        assert "from snippet True" in capsys.readouterr().out
+
+    def test_error_in_snippet_returns_1(self, fake_patchright, capsys):
+        assert run_code("raise RuntimeError('boom')") == 1
+        assert "boom" in capsys.readouterr().out
+
+    def test_complete_script_exit_code(self, fake_patchright):
+        code = "import sys\nimport patchright\nasync def main():\n    pass\nsys.exit(3)\n"
+        assert run_code(code) == 3
+
+    @pytest.mark.skipif(sys.version_info < (3, 11), reason="asyncio.Runner needs Python 3.11")
+    def test_event_loop_reused_between_calls(self, fake_patchright):
+        recorder = types.ModuleType("loop_recorder")
+        recorder.loops = []
+        snippet = "import loop_recorder\nloop_recorder.loops.append(asyncio.get_running_loop())"
+        with mock.patch.dict(sys.modules, {"loop_recorder": recorder}), \
+                mock.patch.object(run, "_runner", None):
+            assert run_code(snippet) == 0
+            assert run_code(snippet) == 0
+            run._runner.close()
+        assert len(recorder.loops) == 2
+        assert recorder.loops[0] is recorder.loops[1]